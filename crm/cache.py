@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+import logging
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_GENERATION_KEY = 'crm:query:generation'
+
+
+def query_cache():
+    """Return the cache named by CRM_QUERY_CACHE, or None when query caching is disabled"""
+    alias = getattr(settings, 'CRM_QUERY_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def query_cache_generation(cache):
+    """Return the token that scopes cached query results to the current data"""
+    return cache.get_or_set(QUERY_CACHE_GENERATION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def _rotate_query_cache_generation(cache):
+    try:
+        cache.set(QUERY_CACHE_GENERATION_KEY, uuid.uuid4().hex, None)
+    except Exception:
+        # The write has already committed, so a cache outage must not surface as a failure
+        logger.exception("Could not expire cached CRM query results")
+
+
+def invalidate_query_cache():
+    """Expire all cached query results once the current transaction commits"""
+    cache = query_cache()
+    if cache is None:
+        return
+    # Rotating before commit would let a concurrent read re-cache the old rows under the new token
+    transaction.on_commit(lambda: _rotate_query_cache_generation(cache))
@@ -1,14 +1,46 @@
 import django_filters
 from django.db import models
+from django.db.models import Exists, OuterRef
 from .models import Customer, Product, Order
 
 
-class CustomerFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(lookup_expr='icontains', help_text="Filter by name (case-insensitive partial match)")
-    email = django_filters.CharFilter(lookup_expr='icontains', help_text="Filter by email (case-insensitive partial match)")
-    created_at = django_filters.DateTimeFilter(help_text="Filter by exact creation date")
-    created_at__gte = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte', help_text="Filter by creation date (greater than or equal)")
-    created_at__lte = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte', help_text="Filter by creation date (less than or equal)")
+def _char_filter(label, lookup_expr='icontains', **kwargs):
+    """Build a case-insensitive CharFilter with the standard help text"""
+    match = 'exact' if lookup_expr == 'iexact' else 'partial'
+    return django_filters.CharFilter(
+        lookup_expr=lookup_expr,
+        help_text=f"Filter by {label} (case-insensitive {match} match)",
+        **kwargs
+    )
+
+
+def _range_filters(filter_class, field_name, label):
+    """Build exact, greater-or-equal and less-or-equal filters for a field"""
+    return (
+        filter_class(field_name=field_name, help_text=f"Filter by exact {label}"),
+        filter_class(field_name=field_name, lookup_expr='gte', help_text=f"Filter by {label} (greater than or equal)"),
+        filter_class(field_name=field_name, lookup_expr='lte', help_text=f"Filter by {label} (less than or equal)"),
+    )
+
+
+class BaseFilterSet(django_filters.FilterSet):
+    """FilterSet that skips form validation and filtering when no filter arguments are supplied"""
+
+    def is_valid(self):
+        return not self.data or super().is_valid()
+
+    @property
+    def qs(self):
+        if not self.data:
+            return self.queryset
+        return super().qs
+
+
+class CustomerFilter(BaseFilterSet):
+    name = _char_filter('name')
+    email = _char_filter('email')
+    email_exact = _char_filter('email', lookup_expr='iexact', field_name='email')
+    created_at, created_at__gte, created_at__lte = _range_filters(django_filters.DateTimeFilter, 'created_at', 'creation date')
     
     # Custom filter for phone number pattern
     phone_pattern = django_filters.CharFilter(method='filter_phone_pattern', help_text="Filter by phone number pattern (e.g., starts with +1)")
@@ -25,18 +57,14 @@ class CustomerFilter(django_filters.FilterSet):
             'name': ['exact', 'icontains'],
             'email': ['exact', 'icontains'],
             'phone': ['exact', 'icontains'],
-            'created_at': ['exact', 'gte', 'lte', 'year', 'month', 'day'],
+            'created_at': ['exact', 'gte', 'lte'],
         }
 
 
-class ProductFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(lookup_expr='icontains', help_text="Filter by name (case-insensitive partial match)")
-    price = django_filters.NumberFilter(help_text="Filter by exact price")
-    price__gte = django_filters.NumberFilter(field_name='price', lookup_expr='gte', help_text="Filter by price (greater than or equal)")
-    price__lte = django_filters.NumberFilter(field_name='price', lookup_expr='lte', help_text="Filter by price (less than or equal)")
-    stock = django_filters.NumberFilter(help_text="Filter by exact stock")
-    stock__gte = django_filters.NumberFilter(field_name='stock', lookup_expr='gte', help_text="Filter by stock (greater than or equal)")
-    stock__lte = django_filters.NumberFilter(field_name='stock', lookup_expr='lte', help_text="Filter by stock (less than or equal)")
+class ProductFilter(BaseFilterSet):
+    name = _char_filter('name')
+    price, price__gte, price__lte = _range_filters(django_filters.NumberFilter, 'price', 'price')
+    stock, stock__gte, stock__lte = _range_filters(django_filters.NumberFilter, 'stock', 'stock')
     
     # Custom filter for low stock
     low_stock = django_filters.BooleanFilter(method='filter_low_stock', help_text="Filter products with low stock (< 10)")
@@ -51,40 +79,45 @@ class ProductFilter(django_filters.FilterSet):
         model = Product
         fields = {
             'name': ['exact', 'icontains'],
-            'price': ['exact', 'gte', 'lte', 'gt', 'lt'],
-            'stock': ['exact', 'gte', 'lte', 'gt', 'lt'],
-            'created_at': ['exact', 'gte', 'lte', 'year', 'month', 'day'],
+            'price': ['exact', 'gte', 'lte'],
+            'stock': ['exact', 'gte', 'lte'],
+            'created_at': ['exact', 'gte', 'lte'],
         }
 
 
-class OrderFilter(django_filters.FilterSet):
-    total_amount = django_filters.NumberFilter(help_text="Filter by exact total amount")
-    total_amount__gte = django_filters.NumberFilter(field_name='total_amount', lookup_expr='gte', help_text="Filter by total amount (greater than or equal)")
-    total_amount__lte = django_filters.NumberFilter(field_name='total_amount', lookup_expr='lte', help_text="Filter by total amount (less than or equal)")
-    
-    order_date = django_filters.DateTimeFilter(help_text="Filter by exact order date")
-    order_date__gte = django_filters.DateTimeFilter(field_name='order_date', lookup_expr='gte', help_text="Filter by order date (greater than or equal)")
-    order_date__lte = django_filters.DateTimeFilter(field_name='order_date', lookup_expr='lte', help_text="Filter by order date (less than or equal)")
+class OrderFilter(BaseFilterSet):
+    total_amount, total_amount__gte, total_amount__lte = _range_filters(django_filters.NumberFilter, 'total_amount', 'total amount')
+    order_date, order_date__gte, order_date__lte = _range_filters(django_filters.DateTimeFilter, 'order_date', 'order date')
     
     # Related field filters
-    customer_name = django_filters.CharFilter(field_name='customer__name', lookup_expr='icontains', help_text="Filter by customer name (case-insensitive partial match)")
-    customer_email = django_filters.CharFilter(field_name='customer__email', lookup_expr='icontains', help_text="Filter by customer email (case-insensitive partial match)")
-    product_name = django_filters.CharFilter(field_name='products__name', lookup_expr='icontains', help_text="Filter by product name (case-insensitive partial match)")
+    customer_name = _char_filter('customer name', field_name='customer__name')
+    customer_email = _char_filter('customer email', field_name='customer__email')
+    product_name = _char_filter('product name', method='filter_by_product_name')
     
     # Custom filter for specific product ID
     product_id = django_filters.NumberFilter(method='filter_by_product_id', help_text="Filter orders that include a specific product ID")
     
+    def filter_queryset(self, queryset):
+        # total_amount is computed from products, so annotate it only when a total filter is used
+        if any(self.form.cleaned_data.get(name) is not None for name in ('total_amount', 'total_amount__gte', 'total_amount__lte')):
+            queryset = queryset.with_total()
+        return super().filter_queryset(queryset)
+
+    def filter_by_product_name(self, queryset, name, value):
+        """Filter orders that include a product whose name matches, using a semi-join instead of a distinct join"""
+        if value:
+            return queryset.filter(Exists(Product.objects.filter(orders=OuterRef('pk'), name__icontains=value)))
+        return queryset
+
     def filter_by_product_id(self, queryset, name, value):
         """Filter orders that include a specific product ID"""
         if value:
-            return queryset.filter(products__id=value).distinct()
+            return queryset.filter(Exists(Order.products.through.objects.filter(order=OuterRef('pk'), product_id=value)))
         return queryset
 
     class Meta:
         model = Order
         fields = {
-            'total_amount': ['exact', 'gte', 'lte', 'gt', 'lt'],
-            'order_date': ['exact', 'gte', 'lte', 'year', 'month', 'day'],
+            'order_date': ['exact', 'gte', 'lte'],
             'customer': ['exact'],
-            'created_at': ['exact', 'gte', 'lte', 'year', 'month', 'day'],
         }
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:55
+
+import django.core.validators
+import re
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20, null=True, validators=[django.core.validators.RegexValidator(message="Phone must be in format '+1234567890' or '123-456-7890'", regex=re.compile('^(\\+\\d{1,3}\\d{9,10}|\\d{3}-\\d{3}-\\d{4})$'))]),
+        ),
+    ]
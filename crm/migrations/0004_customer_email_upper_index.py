@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:57
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0003_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='crm_customer_email_upper_idx'),
+        ),
+    ]
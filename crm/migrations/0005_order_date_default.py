@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0004_customer_email_upper_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='order',
+            name='created_at',
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='order_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
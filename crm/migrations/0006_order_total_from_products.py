@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:02
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_total_amount(apps, schema_editor):
+    """Restore the stored totals from product prices when migrating backwards"""
+    Order = apps.get_model('crm', 'Order')
+    total_field = models.DecimalField(max_digits=10, decimal_places=2)
+    totals = Order.objects.annotate(
+        total=Coalesce(models.Sum('products__price', output_field=total_field), Decimal('0.00'), output_field=total_field)
+    ).values_list('pk', 'total')
+    for pk, total in totals:
+        Order.objects.filter(pk=pk).update(total_amount=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0005_order_date_default'),
+    ]
+
+    # Reversed bottom-up: the column is re-added with a default, then backfilled
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, backfill_total_amount),
+        migrations.AlterField(
+            model_name='order',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='crm_order_total_a_0e7df3_idx',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='total_amount',
+        ),
+    ]
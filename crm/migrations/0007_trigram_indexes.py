@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+# (index name, model, column) for the columns filtered with icontains.
+# PostgreSQL compiles icontains to UPPER(column::text) LIKE UPPER(%s), so the
+# trigram indexes are built on the same expression to be usable by the planner.
+TRIGRAM_INDEXES = [
+    ('crm_customer_name_trgm', 'Customer', 'name'),
+    ('crm_customer_email_trgm', 'Customer', 'email'),
+    ('crm_customer_phone_trgm', 'Customer', 'phone'),
+    ('crm_product_name_trgm', 'Product', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create pg_trgm GIN indexes; other databases keep their plain scans"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, model_name, column in TRIGRAM_INDEXES:
+        table = apps.get_model('crm', model_name)._meta.db_table
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(index_name)} '
+            f'ON {quote(table)} USING gin ((UPPER({quote(column)}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(index_name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0006_order_total_from_products'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
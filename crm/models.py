@@ -1,6 +1,36 @@
 from django.db import models
 from django.core.validators import RegexValidator, MinValueValidator
+from django.db.models.functions import Coalesce, Upper
+from django.utils import timezone
 from decimal import Decimal
+import re
+
+from .cache import invalidate_query_cache
+
+
+PHONE_RE = re.compile(r'^(\+\d{1,3}\d{9,10}|\d{3}-\d{3}-\d{4})$')
+
+
+class CRMQuerySet(models.QuerySet):
+    """QuerySet that expires cached query results on bulk writes, which send no model signals"""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            invalidate_query_cache()
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            invalidate_query_cache()
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if rows:
+            invalidate_query_cache()
+        return rows
 
 
 class Customer(models.Model):
@@ -12,7 +42,7 @@ class Customer(models.Model):
         null=True,
         validators=[
             RegexValidator(
-                regex=r'^(\+\d{1,3}\d{9,10}|\d{3}-\d{3}-\d{4})$',
+                regex=PHONE_RE,
                 message="Phone must be in format '+1234567890' or '123-456-7890'"
             )
         ]
@@ -20,11 +50,19 @@ class Customer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CRMQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.email})"
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name']),
+            models.Index(fields=['created_at']),
+            # Matches the UPPER(email) comparison Django emits for iexact lookups
+            models.Index(Upper('email'), name='crm_customer_email_upper_idx'),
+        ]
 
 
 class Product(models.Model):
@@ -38,38 +76,79 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CRMQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} - ${self.price}"
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name']),
+            models.Index(fields=['price']),
+            models.Index(fields=['stock']),
+        ]
+
+
+class OrderQuerySet(CRMQuerySet):
+    def with_total(self):
+        """Annotate each order with total_amount, the sum of its product prices"""
+        total_field = models.DecimalField(max_digits=10, decimal_places=2)
+        # A correlated subquery never shares a products join already on this queryset
+        # (e.g. product.orders), which would otherwise sum only the joined product
+        totals = (
+            self.model.products.through.objects
+            .filter(order_id=models.OuterRef('pk'))
+            .order_by()
+            .values('order_id')
+            .annotate(total=models.Sum('product__price', output_field=total_field))
+            .values('total')
+        )
+        return self.annotate(
+            total_amount=Coalesce(
+                models.Subquery(totals, output_field=total_field),
+                Decimal('0.00'),
+                output_field=total_field
+            )
+        )
+
+
+class OrderManager(models.Manager.from_queryset(OrderQuerySet)):
+    def get_queryset(self):
+        # Orders are almost always shown with their customer (e.g. __str__)
+        return super().get_queryset().select_related('customer')
 
 
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='orders')
     products = models.ManyToManyField(Product, related_name='orders')
-    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
-    order_date = models.DateTimeField(auto_now_add=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    order_date = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderManager()
+
     def __str__(self):
-        return f"Order #{self.id} - {self.customer.name} - ${self.total_amount}"
+        # Only show the total when with_total() loaded it; aggregating here would query per order
+        if 'total_amount' in self.__dict__:
+            return f"Order #{self.id} - {self.customer.name} - ${self.total}"
+        return f"Order #{self.id} - {self.customer.name}"
+
+    @property
+    def total(self):
+        """Total amount, read from the with_total() annotation when present"""
+        total_amount = getattr(self, 'total_amount', None)
+        if total_amount is None:
+            total_amount = self.calculate_total()
+        # Some backends return aggregates without the field's decimal places
+        return total_amount.quantize(Decimal('0.01'))
 
     def calculate_total(self):
         """Calculate total amount based on associated products"""
-        return sum(product.price for product in self.products.all())
-
-    def save(self, *args, **kwargs):
-        # For new orders, save with initial total, then update after products are added
-        if not self.pk:
-            self.total_amount = Decimal('0.00')
-        super().save(*args, **kwargs)
-    
-    def update_total(self):
-        """Update the total amount after products are set"""
-        self.total_amount = self.calculate_total()
-        self.save()
+        return self.products.aggregate(total=models.Sum('price'))['total'] or Decimal('0.00')
 
     class Meta:
         ordering = ['-order_date']
+        indexes = [
+            models.Index(fields=['-order_date']),
+            models.Index(fields=['customer', '-order_date']),
+        ]
@@ -1,17 +1,113 @@
 import graphene
-from graphene_django import DjangoObjectType
+from graphene_django import DjangoObjectType, DjangoListField
 from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import bypass_get_queryset
 from graphene import relay, ObjectType, String, List, Field, Mutation, InputObjectType
-from django.core.exceptions import ValidationError
-from django.db import transaction
+from graphene.utils.str_converters import to_snake_case
+from graphql import FragmentSpreadNode, InlineFragmentNode, print_ast
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from decimal import Decimal
-import re
-from datetime import datetime
+import hashlib
 
-from .models import Customer, Product, Order
+from .cache import query_cache, query_cache_generation
+from .models import Customer, Product, Order, PHONE_RE
 from .filters import CustomerFilter, ProductFilter, OrderFilter
 
 
+# Selection helpers
+def _collect_selections(nodes, fragments):
+    """Map each field selected under the given nodes to its field nodes, expanding fragments"""
+    selected = {}
+    for node in nodes:
+        if node.selection_set is None:
+            continue
+        for selection in node.selection_set.selections:
+            if isinstance(selection, FragmentSpreadNode):
+                nested = _collect_selections([fragments[selection.name.value]], fragments)
+            elif isinstance(selection, InlineFragmentNode):
+                nested = _collect_selections([selection], fragments)
+            else:
+                nested = {selection.name.value: [selection]}
+            for name, field_nodes in nested.items():
+                selected.setdefault(name, []).extend(field_nodes)
+    return selected
+
+
+def _node_selections(info):
+    """Return the fields selected on the resolved object type, unwrapping relay connections"""
+    selected = _collect_selections(info.field_nodes, info.fragments)
+    if 'edges' in selected:
+        edges = _collect_selections(selected['edges'], info.fragments)
+        selected = _collect_selections(edges.get('node', []), info.fragments)
+    return selected
+
+
+def _model_columns(model, selected):
+    """Return the concrete model fields named in a selection plus the primary and foreign keys"""
+    # Foreign keys stay loaded since related managers read them on every row
+    columns = {model._meta.pk.name}
+    columns.update(field.name for field in model._meta.concrete_fields if field.many_to_one)
+    for name in selected:
+        try:
+            field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            columns.add(field.name)
+    return columns
+
+
+# Query result caching
+QUERY_CACHE_TIMEOUT = 60
+
+
+def _query_cache_key(queryset, info, cache):
+    """Build a cache key from the generated SQL and the requested selection"""
+    sql, params = queryset.query.sql_with_params()
+    selection = [print_ast(node) for node in info.field_nodes]
+    fragments = [print_ast(fragment) for _, fragment in sorted(info.fragments.items())]
+    key_data = repr((query_cache_generation(cache), sql, params, selection, fragments))
+    return f"crm:query:{hashlib.blake2b(key_data.encode()).hexdigest()}"
+
+
+class _CachedResults:
+    """Lazy sequence over a queryset whose count and page slices are served from the cache"""
+
+    def __init__(self, queryset, key, cache):
+        self.queryset = queryset
+        self.key = key
+        self.cache = cache
+
+    def __len__(self):
+        return self.cache.get_or_set(f"{self.key}:count", self.queryset.count, QUERY_CACHE_TIMEOUT)
+
+    def __getitem__(self, item):
+        queryset = self.queryset[item]
+        key = f"{self.key}:{item.start}:{item.stop}"
+        if item.stop is None:
+            # Open-ended slices are narrowed again by the connection before evaluation
+            return _CachedResults(queryset, key, self.cache)
+        return self.cache.get_or_set(key, lambda: list(queryset), QUERY_CACHE_TIMEOUT)
+
+
+class CachedDjangoFilterConnectionField(DjangoFilterConnectionField):
+    """Filter connection whose counts and pages are cached until the next write to CRM models
+
+    Caching is off unless CRM_QUERY_CACHE names a cache shared by every worker, such as Redis.
+    """
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class):
+        queryset = super().resolve_queryset(connection, iterable, info, args, filtering_args, filterset_class)
+        cache = query_cache()
+        if cache is None:
+            return queryset
+        return _CachedResults(queryset, _query_cache_key(queryset, info, cache), cache)
+
+
 # GraphQL Types
 class CustomerType(DjangoObjectType):
     class Meta:
@@ -19,6 +115,11 @@ class CustomerType(DjangoObjectType):
         filter_fields = ['name', 'email', 'phone', 'created_at']
         interfaces = (relay.Node,)
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        """Load only the columns requested by the query"""
+        return queryset.only(*_model_columns(Customer, _node_selections(info)))
+
 
 class ProductType(DjangoObjectType):
     class Meta:
@@ -26,17 +127,61 @@ class ProductType(DjangoObjectType):
         filter_fields = ['name', 'price', 'stock', 'created_at']
         interfaces = (relay.Node,)
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        """Load only the columns requested by the query"""
+        return queryset.only(*_model_columns(Product, _node_selections(info)))
+
 
 class OrderType(DjangoObjectType):
-    products = List(ProductType)
+    products = DjangoListField(ProductType)
+    total_amount = graphene.Decimal(required=True)
     
     class Meta:
         model = Order
-        filter_fields = ['total_amount', 'order_date', 'customer']
+        filterset_class = OrderFilter
         interfaces = (relay.Node,)
-    
+
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        """Load only the requested columns, joining customers and prefetching products when selected"""
+        selected = _node_selections(info)
+        columns = _model_columns(Order, selected)
+
+        if 'customer' in selected:
+            customer = _collect_selections(selected['customer'], info.fragments)
+            columns.update(f'customer__{name}' for name in _model_columns(Customer, customer))
+            queryset = queryset.select_related('customer')
+        else:
+            # Drop the customer join OrderManager adds by default
+            queryset = queryset.select_related(None)
+
+        if 'totalAmount' in selected:
+            queryset = queryset.with_total()
+
+        if 'products' in selected:
+            products = _collect_selections(selected['products'], info.fragments)
+            queryset = queryset.prefetch_related(
+                Prefetch('products', queryset=Product.objects.only(*_model_columns(Product, products)))
+            )
+
+        return queryset.only(*columns)
+
+    @bypass_get_queryset
+    def resolve_customer(self, info):
+        # Served from the select_related cache rather than a per-order lookup
+        return self.customer
+
     def resolve_products(self, info):
-        return self.products.all()
+        products = self.products.all()
+        if 'products' in getattr(self, '_prefetched_objects_cache', {}):
+            # Evaluated here so ProductType.get_queryset does not re-query the prefetched rows
+            return list(products)
+        # Otherwise DjangoListField narrows the queryset to the requested columns
+        return products
+
+    def resolve_total_amount(self, info):
+        return self.total
 
 
 # Input Types
@@ -48,7 +193,7 @@ class CustomerInput(InputObjectType):
 
 class ProductInput(InputObjectType):
     name = String(required=True)
-    price = graphene.Float(required=True)
+    price = graphene.Decimal(required=True)
     stock = graphene.Int()
 
 
@@ -92,30 +237,29 @@ class CreateCustomer(Mutation):
 
     def mutate(self, info, input):
         try:
-            # Validate email uniqueness
-            if Customer.objects.filter(email=input.email).exists():
-                return CustomerMutationResult(
-                    customer=None,
-                    message="Email already exists",
-                    success=False
-                )
-
             # Validate phone format if provided
             if input.phone:
-                phone_pattern = r'^(\+\d{1,3}\d{9,10}|\d{3}-\d{3}-\d{4})$'
-                if not re.match(phone_pattern, input.phone):
+                if not PHONE_RE.match(input.phone):
                     return CustomerMutationResult(
                         customer=None,
                         message="Phone must be in format '+1234567890' or '123-456-7890'",
                         success=False
                     )
 
-            # Create customer
-            customer = Customer.objects.create(
-                name=input.name,
-                email=input.email,
-                phone=input.phone
-            )
+            # Create customer, relying on the unique email index for uniqueness
+            try:
+                with transaction.atomic():
+                    customer = Customer.objects.create(
+                        name=input.name,
+                        email=input.email,
+                        phone=input.phone
+                    )
+            except IntegrityError:
+                return CustomerMutationResult(
+                    customer=None,
+                    message="Email already exists",
+                    success=False
+                )
 
             return CustomerMutationResult(
                 customer=customer,
@@ -138,39 +282,45 @@ class BulkCreateCustomers(Mutation):
     Output = BulkCustomerMutationResult
 
     def mutate(self, info, input):
-        created_customers = []
         errors = []
-        
+        pending = {}
+
+        # Validate inputs in Python before touching the database
+        for i, customer_data in enumerate(input):
+            if customer_data.email in pending:
+                errors.append((i, f"Customer {i+1}: Email already exists"))
+                continue
+
+            if customer_data.phone and not PHONE_RE.match(customer_data.phone):
+                errors.append((i, f"Customer {i+1}: Invalid phone format"))
+                continue
+
+            pending[customer_data.email] = (i, customer_data)
+
         try:
             with transaction.atomic():
-                for i, customer_data in enumerate(input):
-                    try:
-                        # Validate email uniqueness
-                        if Customer.objects.filter(email=customer_data.email).exists():
-                            errors.append(f"Customer {i+1}: Email already exists")
-                            continue
-
-                        # Validate phone format if provided
-                        if customer_data.phone:
-                            phone_pattern = r'^(\+\d{1,3}\d{9,10}|\d{3}-\d{3}-\d{4})$'
-                            if not re.match(phone_pattern, customer_data.phone):
-                                errors.append(f"Customer {i+1}: Invalid phone format")
-                                continue
-
-                        # Create customer
-                        customer = Customer.objects.create(
+                # Reject emails that are already taken with a single lookup
+                existing = Customer.objects.filter(email__in=list(pending)).order_by().values_list('email', flat=True)
+                for email in existing:
+                    i, _ = pending.pop(email)
+                    errors.append((i, f"Customer {i+1}: Email already exists"))
+
+                # Create the remaining customers in batched inserts that return their ids
+                created_customers = Customer.objects.bulk_create(
+                    [
+                        Customer(
                             name=customer_data.name,
                             email=customer_data.email,
                             phone=customer_data.phone
                         )
-                        created_customers.append(customer)
-
-                    except Exception as e:
-                        errors.append(f"Customer {i+1}: {str(e)}")
+                        for _, customer_data in pending.values()
+                    ],
+                    batch_size=500
+                )
 
             return BulkCustomerMutationResult(
                 customers=created_customers,
-                errors=errors,
+                errors=[message for _, message in sorted(errors)],
                 success=len(created_customers) > 0
             )
 
@@ -190,8 +340,9 @@ class CreateProduct(Mutation):
 
     def mutate(self, info, input):
         try:
-            # Validate price is positive
-            if input.price <= 0:
+            # Validate price is positive once rounded to the stored two decimal places
+            price = input.price.quantize(Decimal('0.01'))
+            if price < Decimal('0.01'):
                 return ProductMutationResult(
                     product=None,
                     message="Price must be positive",
@@ -210,7 +361,7 @@ class CreateProduct(Mutation):
             # Create product
             product = Product.objects.create(
                 name=input.name,
-                price=Decimal(str(input.price)),
+                price=price,
                 stock=stock
             )
 
@@ -254,26 +405,36 @@ class CreateOrder(Mutation):
                     success=False
                 )
 
-            products = Product.objects.filter(id__in=input.product_ids)
-            if len(products) != len(input.product_ids):
+            # Fetch only ids and prices rather than full Product instances
+            product_rows = list(
+                Product.objects.filter(id__in=input.product_ids).order_by().values_list('id', 'price')
+            )
+            if len(product_rows) != len(set(input.product_ids)):
                 return OrderMutationResult(
                     order=None,
                     message="One or more invalid product IDs",
                     success=False
                 )
 
-            # Calculate total amount
-            total_amount = sum(product.price for product in products)
+            # Calculate total amount from the fetched prices
+            total_amount = sum(price for _, price in product_rows)
 
-            # Create order
+            # Create the order and its product links in a single transaction
             with transaction.atomic():
                 order = Order.objects.create(
                     customer=customer,
-                    total_amount=total_amount,
-                    order_date=input.order_date or datetime.now()
+                    order_date=input.order_date or timezone.now()
                 )
-                order.products.set(products)
-                order.update_total()  # Recalculate total after setting products
+                # A new order has no existing links, so insert the join rows directly.
+                # The order's post_save already expires cached results when this commits.
+                OrderProduct = Order.products.through
+                OrderProduct.objects.bulk_create([
+                    OrderProduct(order_id=order.id, product_id=product_id)
+                    for product_id, _ in product_rows
+                ])
+
+            # Reuse the computed total instead of aggregating it again
+            order.total_amount = total_amount
 
             return OrderMutationResult(
                 order=order,
@@ -292,17 +453,17 @@ class CreateOrder(Mutation):
 # Query class
 class Query(ObjectType):
     # Basic queries with ordering support
-    all_customers = DjangoFilterConnectionField(
+    all_customers = CachedDjangoFilterConnectionField(
         CustomerType, 
         filterset_class=CustomerFilter,
         order_by=graphene.List(graphene.String)
     )
-    all_products = DjangoFilterConnectionField(
+    all_products = CachedDjangoFilterConnectionField(
         ProductType, 
         filterset_class=ProductFilter,
         order_by=graphene.List(graphene.String)
     )
-    all_orders = DjangoFilterConnectionField(
+    all_orders = CachedDjangoFilterConnectionField(
         OrderType, 
         filterset_class=OrderFilter,
         order_by=graphene.List(graphene.String)
@@ -319,19 +480,19 @@ class Query(ObjectType):
 
     def resolve_customer_by_id(self, info, id):
         try:
-            return Customer.objects.get(id=id)
+            return CustomerType.get_queryset(Customer.objects, info).get(id=id)
         except Customer.DoesNotExist:
             return None
 
     def resolve_product_by_id(self, info, id):
         try:
-            return Product.objects.get(id=id)
+            return ProductType.get_queryset(Product.objects, info).get(id=id)
         except Product.DoesNotExist:
             return None
 
     def resolve_order_by_id(self, info, id):
         try:
-            return Order.objects.get(id=id)
+            return OrderType.get_queryset(Order.objects, info).get(id=id)
         except Order.DoesNotExist:
             return None
 
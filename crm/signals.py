@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .cache import invalidate_query_cache
+from .models import Customer, Product, Order
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+def invalidate_on_write(sender, **kwargs):
+    invalidate_query_cache()
+
+
+@receiver(m2m_changed, sender=Order.products.through)
+def invalidate_on_order_products_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_query_cache()
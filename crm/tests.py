@@ -1,3 +1,258 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from graphql_relay import from_global_id
+
+from alx_backend_graphql_crm.schema import schema
+from .models import Customer, Product, Order
+
+
+ALL_ORDERS = '''
+    query {
+        allOrders {
+            edges { node { id totalAmount } }
+        }
+    }
+'''
+
+
+@override_settings(CRM_QUERY_CACHE='default')
+class QueryCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        self.product = Product.objects.create(name='Laptop', price=Decimal('999.99'), stock=5)
+        order = Order.objects.create(customer=self.customer)
+        order.products.add(self.product)
+
+    def execute(self, query, variables=None):
+        # Run on-commit hooks immediately so invalidation is visible inside the test transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            result = schema.execute(query, variable_values=variables)
+        self.assertIsNone(result.errors)
+        return result.data
+
+    def totals(self):
+        edges = self.execute(ALL_ORDERS)['allOrders']['edges']
+        return [edge['node']['totalAmount'] for edge in edges]
+
+    def test_repeated_query_is_served_from_cache(self):
+        self.execute(ALL_ORDERS)
+        with self.assertNumQueries(0):
+            self.execute(ALL_ORDERS)
+
+    @override_settings(CRM_QUERY_CACHE=None)
+    def test_query_caching_is_off_without_a_shared_cache(self):
+        self.execute(ALL_ORDERS)
+        with self.assertNumQueries(2):
+            self.execute(ALL_ORDERS)
+
+    def test_cache_failure_does_not_fail_committed_mutation(self):
+        mutation = '''
+            mutation {
+                createCustomer(input: {name: "Bob", email: "bob@example.com"}) { success message }
+            }
+        '''
+        with mock.patch.object(cache, 'set', side_effect=ConnectionError), self.assertLogs('crm.cache', 'ERROR'):
+            data = self.execute(mutation)
+        self.assertTrue(data['createCustomer']['success'], data['createCustomer']['message'])
+        self.assertTrue(Customer.objects.filter(email='bob@example.com').exists())
+
+    def test_create_order_mutation_invalidates_cached_page(self):
+        self.assertEqual(len(self.totals()), 1)
+
+        data = self.execute(
+            '''
+            mutation ($input: OrderInput!) {
+                createOrder(input: $input) { success message }
+            }
+            ''',
+            {'input': {'customerId': str(self.customer.id), 'productIds': [str(self.product.id)]}}
+        )
+        self.assertTrue(data['createOrder']['success'], data['createOrder']['message'])
+
+        self.assertEqual(len(self.totals()), 2)
+
+    def test_queryset_update_invalidates_cached_totals(self):
+        self.assertEqual(self.totals(), ['999.99'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=self.product.pk).update(price=Decimal('10.00'))
+
+        self.assertEqual(self.totals(), ['10.00'])
+
+    def test_order_products_change_invalidates_cached_totals(self):
+        self.assertEqual(self.totals(), ['999.99'])
+        mouse = Product.objects.create(name='Mouse', price=Decimal('25.50'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.get().products.add(mouse)
+
+        self.assertEqual(self.totals(), ['1025.49'])
+
+
+class OrderStrTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        product = Product.objects.create(name='Laptop', price=Decimal('999.99'))
+        for _ in range(3):
+            Order.objects.create(customer=customer).products.add(product)
+
+    def test_str_does_not_query_per_order(self):
+        with self.assertNumQueries(1):
+            labels = [str(order) for order in Order.objects.all()]
+        self.assertNotIn('$', labels[0])
+
+    def test_str_includes_annotated_total(self):
+        with self.assertNumQueries(1):
+            labels = [str(order) for order in Order.objects.with_total()]
+        self.assertTrue(labels[0].endswith('Alice - $999.99'))
+
+
+class OrderTotalTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        self.laptop = Product.objects.create(name='Laptop', price=Decimal('999.99'))
+        self.mouse = Product.objects.create(name='Mouse', price=Decimal('25.50'))
+        self.keyboard = Product.objects.create(name='Keyboard', price=Decimal('75.99'))
+        self.orders = []
+        for products in ([self.laptop, self.mouse], [self.laptop, self.keyboard], [self.keyboard], []):
+            order = Order.objects.create(customer=customer)
+            order.products.set(products)
+            self.orders.append(order)
+
+    def execute(self, query):
+        result = schema.execute(query)
+        self.assertIsNone(result.errors)
+        return result.data
+
+    def test_with_total_through_product_orders(self):
+        totals = {order.pk: order.total for order in self.keyboard.orders.with_total()}
+        self.assertEqual(totals, {
+            self.orders[1].pk: Decimal('1075.98'),
+            self.orders[2].pk: Decimal('75.99'),
+        })
+
+    def test_nested_product_orders_total_amount(self):
+        data = self.execute('''
+            query {
+                allProducts(name: "Keyboard") {
+                    edges { node { orders { edges { node { totalAmount } } } } }
+                }
+            }
+        ''')
+        orders = data['allProducts']['edges'][0]['node']['orders']['edges']
+        self.assertCountEqual([edge['node']['totalAmount'] for edge in orders], ['1075.98', '75.99'])
+
+    def order_totals(self, connection):
+        return sorted((edge['node']['totalAmount'] for edge in connection['edges']), key=Decimal)
+
+    def test_all_orders_total_amount(self):
+        data = self.execute('{ allOrders { edges { node { totalAmount } } } }')
+        self.assertEqual(self.order_totals(data['allOrders']), ['0.00', '75.99', '1025.49', '1075.98'])
+
+    def test_all_orders_total_amount_filters(self):
+        data = self.execute('''
+            query {
+                gte: allOrders(totalAmount_Gte: "1000") { edges { node { totalAmount } } }
+                lte: allOrders(totalAmount_Lte: "100") { edges { node { totalAmount } } }
+                exact: allOrders(totalAmount: "75.99") { edges { node { totalAmount } } }
+                product: allOrders(productName: "Keyboard", totalAmount_Gte: "1000") { edges { node { totalAmount } } }
+            }
+        ''')
+        self.assertEqual(self.order_totals(data['gte']), ['1025.49', '1075.98'])
+        self.assertEqual(self.order_totals(data['lte']), ['0.00', '75.99'])
+        self.assertEqual(self.order_totals(data['exact']), ['75.99'])
+        self.assertEqual(self.order_totals(data['product']), ['1075.98'])
+
+    def test_nested_orders_total_amount_filters(self):
+        data = self.execute('''
+            query {
+                allCustomers {
+                    edges { node { orders(totalAmount_Gte: "1000") { edges { node { totalAmount } } } } }
+                }
+                allProducts(name: "Keyboard") {
+                    edges { node { orders(totalAmount_Gte: "1000") { edges { node { totalAmount } } } } }
+                }
+            }
+        ''')
+        customer_orders = data['allCustomers']['edges'][0]['node']['orders']
+        product_orders = data['allProducts']['edges'][0]['node']['orders']
+        self.assertEqual(self.order_totals(customer_orders), ['1025.49', '1075.98'])
+        self.assertEqual(self.order_totals(product_orders), ['1075.98'])
+
+    def test_create_order_returns_total_from_products(self):
+        data = self.execute(f'''
+            mutation {{
+                createOrder(input: {{
+                    customerId: "{self.orders[0].customer_id}",
+                    productIds: ["{self.mouse.pk}", "{self.keyboard.pk}"]
+                }}) {{ success order {{ totalAmount }} }}
+            }}
+        ''')
+        self.assertTrue(data['createOrder']['success'])
+        self.assertEqual(data['createOrder']['order']['totalAmount'], '101.49')
+        self.assertEqual(Order.objects.with_total().get(pk=Order.objects.latest('pk').pk).total, Decimal('101.49'))
+
+
+class BulkCreateCustomersTests(TestCase):
+    def setUp(self):
+        Customer.objects.create(name='Existing', email='existing@example.com')
+
+    def test_mixed_batch(self):
+        mutation = '''
+            mutation {
+                bulkCreateCustomers(input: [
+                    {name: "Alice", email: "alice@example.com", phone: "+12345678901"},
+                    {name: "Alice Again", email: "alice@example.com"},
+                    {name: "Existing", email: "existing@example.com"},
+                    {name: "Bad Phone", email: "bad@example.com", phone: "12345"},
+                    {name: "Bob", email: "bob@example.com", phone: "123-456-7890"}
+                ]) { customers { id name email } errors success }
+            }
+        '''
+        # Savepoint, existing-email lookup, batched insert, release
+        with self.assertNumQueries(4):
+            result = schema.execute(mutation)
+        self.assertIsNone(result.errors)
+        data = result.data['bulkCreateCustomers']
+
+        self.assertTrue(data['success'])
+        self.assertEqual(data['errors'], [
+            'Customer 2: Email already exists',
+            'Customer 3: Email already exists',
+            'Customer 4: Invalid phone format',
+        ])
+        self.assertEqual([customer['email'] for customer in data['customers']], ['alice@example.com', 'bob@example.com'])
+        # Returned customers carry the primary keys assigned by the insert
+        returned = {from_global_id(customer['id'])[1]: customer['email'] for customer in data['customers']}
+        stored = dict(Customer.objects.filter(email__in=['alice@example.com', 'bob@example.com']).values_list('pk', 'email'))
+        self.assertEqual(returned, {str(pk): email for pk, email in stored.items()})
+        self.assertFalse(Customer.objects.filter(email='bad@example.com').exists())
+
+
+class CreateProductTests(TestCase):
+    def create_product(self, price):
+        result = schema.execute(
+            '''
+            mutation ($price: Decimal!) {
+                createProduct(input: {name: "Cable", price: $price}) { success message product { price } }
+            }
+            ''',
+            variable_values={'price': price}
+        )
+        self.assertIsNone(result.errors)
+        return result.data['createProduct']
+
+    def test_price_that_rounds_to_zero_is_rejected(self):
+        data = self.create_product('0.004')
+        self.assertFalse(data['success'])
+        self.assertEqual(data['message'], 'Price must be positive')
+        self.assertFalse(Product.objects.exists())
+
+    def test_price_is_stored_rounded_to_cents(self):
+        data = self.create_product('9.999')
+        self.assertTrue(data['success'], data['message'])
+        self.assertEqual(data['product']['price'], '10.00')